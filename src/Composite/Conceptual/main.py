@@ -7,8 +7,14 @@ structures as if they were individual objects.
 
 
 from __future__ import annotations
+import os
+import sys
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 
 class Component(ABC):
@@ -17,6 +23,14 @@ class Component(ABC):
     complex objects of a composition.
     """
 
+    _parent: Optional[Component] = None
+
+    _cache: Optional[str] = None
+    """
+    Composites remember the result of their last `operation()` call until
+    something changes in their subtree.
+    """
+
     @property
     def parent(self) -> Component:
         return self._parent
@@ -53,6 +67,41 @@ class Component(ABC):
 
         return False
 
+    def children(self) -> Iterator[Component]:
+        """
+        Iterates over the direct children of the component, if it has any.
+        """
+
+        return iter(())
+
+    def invalidate(self) -> None:
+        """
+        Forgets the cached results of this component and of all its ancestors.
+        A component whose result depends on some state must call this whenever
+        that state changes.
+
+        The walk up the tree stops at the first plain Composite without a
+        cached result: since it caches its result only after all its children
+        have cached theirs, the ancestors above it can't have one either.
+        Subclasses that override `operation()` may not cache at all, so the
+        walk goes on past them. That makes a change O(depth) at most.
+        """
+
+        self._cache = None
+        parent = self.parent
+        while parent is not None:
+            if parent._cache is None and _is_plain_composite(parent):
+                break
+            parent._cache = None
+            parent = parent.parent
+
+    def __getstate__(self) -> dict:
+        # A pickled subtree doesn't drag its ancestors along. Composites
+        # restore the parent links of their children when they are unpickled.
+        state = self.__dict__.copy()
+        state.pop("_parent", None)
+        return state
+
     @abstractmethod
     def operation(self) -> str:
         """
@@ -77,6 +126,116 @@ class Leaf(Component):
         return "Leaf"
 
 
+class ChildList:
+    """
+    The ordered list of a composite's children. Children are found by identity
+    through an index, so removing one only marks its slot as empty, whatever
+    the number of its siblings. The empty slots are squeezed out, in one pass
+    that also renumbers the index, the next time a child is accessed by
+    position or when they make up half of the list. Removals are thus O(1)
+    when amortized over a run of them, but a positional access after each
+    removal costs a pass over the list every time. Inserting at a position is
+    a list insert, after which the index is rebuilt lazily, on the next lookup
+    by identity.
+    """
+
+    def __init__(self, components: Iterable[Component] = ()) -> None:
+        self._items: List[Optional[Component]] = []
+        self._slots: Dict[int, int] = {}
+        self._holes = 0
+        self._stale = False
+        for component in components:
+            self.append(component)
+
+    def __getstate__(self) -> List[Component]:
+        # The index is keyed by object ids, which don't survive pickling.
+        return list(self)
+
+    def __setstate__(self, state: List[Component]) -> None:
+        self.__init__(state)
+
+    def _index(self) -> Dict[int, int]:
+        if self._stale:
+            self._slots = {id(c): i for i, c in enumerate(self._items) if c is not None}
+            self._stale = False
+        return self._slots
+
+    def _compact(self) -> None:
+        if self._holes:
+            self._items = [c for c in self._items if c is not None]
+            self._slots = {id(c): i for i, c in enumerate(self._items)}
+            self._holes = 0
+            self._stale = False
+
+    def _slot(self, component: Component) -> int:
+        slot = self._index().get(id(component))
+        if slot is None:
+            raise ValueError("The component isn't a child of this composite.")
+        return slot
+
+    def __len__(self) -> int:
+        return len(self._items) - self._holes
+
+    def __iter__(self) -> Iterator[Component]:
+        return (c for c in self._items if c is not None)
+
+    def __contains__(self, component: Component) -> bool:
+        return id(component) in self._index()
+
+    def __getitem__(self, position: int) -> Component:
+        self._compact()
+        return self._items[position]
+
+    def index(self, component: Component) -> int:
+        self._compact()
+        return self._slot(component)
+
+    def append(self, component: Component) -> None:
+        if component in self:
+            raise ValueError("The component is already a child of this composite.")
+        self._slots[id(component)] = len(self._items)
+        self._items.append(component)
+
+    def insert(self, position: int, component: Component) -> None:
+        if component in self:
+            raise ValueError("The component is already a child of this composite.")
+        self._compact()
+        self._items.insert(position, component)
+        self._stale = True
+
+    def remove(self, component: Component) -> None:
+        slot = self._slot(component)
+        self._items[slot] = None
+        del self._slots[id(component)]
+        self._holes += 1
+        if self._holes * 2 > len(self._items):
+            self._compact()
+
+    def move(self, component: Component, position: int) -> None:
+        self.remove(component)
+        self.insert(position, component)
+
+    def extend(self, components: Iterable[Component]) -> None:
+        # The whole batch is checked first, so that a duplicate leaves the
+        # list unchanged.
+        components = list(components)
+        ids = {id(component) for component in components}
+        if len(ids) < len(components) or not ids.isdisjoint(self._index()):
+            raise ValueError("Some components are already children of this composite.")
+        for component in components:
+            self._slots[id(component)] = len(self._items)
+            self._items.append(component)
+
+    def remove_many(self, components: Iterable[Component]) -> None:
+        ids = {id(component) for component in components}
+        index = self._index()
+        if not ids.issubset(index):
+            raise ValueError("Some components aren't children of this composite.")
+        self._items = [c for c in self._items if c is not None and id(c) not in ids]
+        self._slots = {id(c): i for i, c in enumerate(self._items)}
+        self._holes = 0
+
+
 class Composite(Component):
     """
     The Composite class represents the complex components that may have
@@ -85,7 +244,12 @@ class Composite(Component):
     """
 
     def __init__(self) -> None:
-        self._children: List[Component] = []
+        self._children = ChildList()
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        for child in self._children:
+            child._parent = self
 
     """
     A composite object can add or remove other components (both simple or
@@ -95,26 +259,565 @@ class Composite(Component):
     def add(self, component: Component) -> None:
         self._children.append(component)
         component.parent = self
+        self.invalidate()
 
     def remove(self, component: Component) -> None:
         self._children.remove(component)
         component.parent = None
+        self.invalidate()
+
+    def add_many(self, components: Iterable[Component]) -> None:
+        components = list(components)
+        self._children.extend(components)
+        for component in components:
+            component.parent = self
+        self.invalidate()
+
+    def remove_many(self, components: Iterable[Component]) -> None:
+        components = list(components)
+        self._children.remove_many(components)
+        for component in components:
+            component.parent = None
+        self.invalidate()
+
+    def insert(self, position: int, component: Component) -> None:
+        self._children.insert(position, component)
+        component.parent = self
+        self.invalidate()
+
+    def move(self, component: Component, position: int) -> None:
+        self._children.move(component, position)
+        self.invalidate()
+
+    def get_child(self, position: int) -> Component:
+        return self._children[position]
 
     def is_composite(self) -> bool:
         return True
 
+    def children(self) -> Iterator[Component]:
+        return iter(self._children)
+
     def operation(self) -> str:
         """
         The Composite executes its primary logic in a particular way. It
         traverses recursively through all its children, collecting and summing
         their results. Since the composite's children pass these calls to their
         children and so forth, the whole object tree is traversed as a result.
+
+        The result is cached, so asking an unchanged tree again is O(1), and
+        after a change only the composites on the path to it are recomputed.
         """
 
-        results = []
-        for child in self._children:
-            results.append(child.operation())
-        return f"Branch({'+'.join(results)})"
+        if self._cache is not None:
+            return self._cache
+
+        # The subtree is walked with an explicit stack rather than recursion,
+        # so even trees thousands of levels deep don't hit the recursion limit.
+        # Cached subtrees aren't entered at all.
+        stack = [(self, iter(self._children), [])]
+        while stack:
+            node, children, results = stack[-1]
+            child = next(children, _DONE)
+            if child is _DONE:
+                stack.pop()
+                node._cache = f"Branch({'+'.join(results)})"
+                if stack:
+                    stack[-1][2].append(node._cache)
+            elif type(child).operation is Composite.operation and child._cache is None:
+                stack.append((child, iter(child._children), []))
+            else:
+                results.append(child.operation())
+        return self._cache
+
+
+_DONE = object()
+
+
+def _is_plain_composite(component: Component) -> bool:
+    return type(component).operation is Composite.operation
+
+
+def _evaluate_many(components: List[Component]) -> str:
+    return "+".join(component.operation() for component in components)
+
+
+def parallel_operation(component: Component, executor: Optional[Executor] = None,
+                       workers: Optional[int] = None, min_size: int = 1000) -> str:
+    """
+    Returns the same text as `component.operation()`, but evaluates the
+    independent subtrees in parallel on `executor` (a new thread pool of
+    `workers` threads by default).
+
+    The tree is cut into work units of similar size: starting from the root,
+    every composite bigger than about 1/(4 * workers) of the tree is split
+    into its children, and consecutive smaller siblings, leaves included, are
+    grouped into units of about that size, each evaluated as a whole by the
+    pool. The results are then merged in child order. Trees smaller than `min_size`
+    nodes are simply evaluated serially.
+
+    With a ProcessPoolExecutor, each work unit is pickled without its
+    ancestors, and the results are not cached in the original tree.
+    """
+
+    if not _is_plain_composite(component) or component._cache is not None:
+        return component.operation()
+
+    sizes: Dict[int, int] = {}
+    for node in iter_postorder(component):
+        sizes[id(node)] = 1 + sum(sizes[id(child)] for child in node.children())
+    workers = workers or os.cpu_count() or 1
+    total = sizes[id(component)]
+    if total < min_size or workers == 1:
+        return component.operation()
+    target = max(1, total // (4 * workers))
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # The plan lists the pieces of the result in order: literal text and
+        # the futures of the work units. Each frame of the stack holds the
+        # children left to visit, whether no piece was emitted yet, and the
+        # small siblings gathered so far for the next work unit with their
+        # total size.
+        plan: List[Union[str, Future]] = ["Branch("]
+
+        def emit(frame: list, piece: Union[str, Future]) -> None:
+            if not frame[1]:
+                plan.append("+")
+            frame[1] = False
+            plan.append(piece)
+
+        def submit(frame: list) -> None:
+            if frame[2]:
+                emit(frame, executor.submit(_evaluate_many, frame[2]))
+                frame[2], frame[3] = [], 0
+
+        stack = [[component.children(), True, [], 0]]
+        while stack:
+            frame = stack[-1]
+            child = next(frame[0], _DONE)
+            if child is _DONE:
+                submit(frame)
+                stack.pop()
+                plan.append(")")
+            elif child._cache is not None:
+                submit(frame)
+                emit(frame, child._cache)
+            elif _is_plain_composite(child) and sizes[id(child)] > target:
+                submit(frame)
+                emit(frame, "Branch(")
+                stack.append([child.children(), True, [], 0])
+            else:
+                frame[2].append(child)
+                frame[3] += sizes[id(child)]
+                if frame[3] >= target:
+                    submit(frame)
+        return "".join(p if isinstance(p, str) else p.result() for p in plan)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+class BusyLeaf(Leaf):
+    """
+    A leaf with an expensive operation, used by the benchmark below.
+    """
+
+    def __init__(self, cost: int) -> None:
+        self._cost = cost
+
+    def operation(self) -> str:
+        total = 0
+        for i in range(self._cost):
+            total += i * i
+        return "Leaf"
+
+
+def _synthetic_tree(branching: int, leaves: int, cost: int) -> Composite:
+    level: List[Component] = [BusyLeaf(cost) for _ in range(leaves)]
+    while len(level) > 1:
+        parents = []
+        for start in range(0, len(level), branching):
+            parent = Composite()
+            for child in level[start:start + branching]:
+                parent.add(child)
+            parents.append(parent)
+        level = parents
+    return level[0]
+
+
+def benchmark_parallel_operation(leaves: int = 4096,
+                                 branchings: Sequence[int] = (2, 8, 64),
+                                 costs: Sequence[int] = (0, 2000)) -> None:
+    """
+    Compares the serial `operation()` with `parallel_operation()` on thread and
+    process pools, for synthetic trees of various shapes and leaf costs.
+    """
+
+    workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(workers) as threads, ProcessPoolExecutor(workers) as processes:
+        for branching in branchings:
+            for cost in costs:
+                timings = {}
+                for name, run in (
+                    ("serial", lambda tree: tree.operation()),
+                    ("threads", lambda tree: parallel_operation(tree, threads, workers, 1)),
+                    ("processes", lambda tree: parallel_operation(tree, processes, workers, 1)),
+                ):
+                    tree = _synthetic_tree(branching, leaves, cost)
+                    start = time.perf_counter()
+                    run(tree)
+                    timings[name] = time.perf_counter() - start
+                print(f"branching {branching:3}, leaf cost {cost:5}: " + ", ".join(
+                    f"{name} {seconds * 1000:8.1f} ms" for name, seconds in timings.items()))
+
+
+def iter_preorder(root: Component) -> Iterator[Component]:
+    """
+    Yields every component of a tree, each parent before its children. Like
+    the other traversals, it keeps an explicit stack of child iterators, so it
+    uses O(depth) memory and never recurses.
+    """
+
+    stack = [iter((root,))]
+    while stack:
+        node = next(stack[-1], _DONE)
+        if node is _DONE:
+            stack.pop()
+            continue
+        yield node
+        stack.append(node.children())
+
+
+def iter_postorder(root: Component) -> Iterator[Component]:
+    """
+    Yields every component of a tree, each parent after its children.
+    """
+
+    stack = [(root, root.children())]
+    while stack:
+        node, children = stack[-1]
+        child = next(children, _DONE)
+        if child is _DONE:
+            stack.pop()
+            yield node
+        else:
+            stack.append((child, child.children()))
+
+
+def iter_bfs(root: Component) -> Iterator[Component]:
+    """
+    Yields every component of a tree, level by level. Unlike the depth-first
+    traversals, it has to remember a whole level of the tree at a time.
+    """
+
+    queue = deque((root,))
+    while queue:
+        node = queue.popleft()
+        yield node
+        queue.extend(node.children())
+
+
+def stream_operation(component: Component, write: Callable[[str], object],
+                     chunk_size: int = 65536) -> None:
+    """
+    Writes the same text as `component.operation()`, in chunks of about
+    `chunk_size` characters, without building the whole string. Apart from the
+    current chunk, it only needs O(depth) memory. Cached results are written as
+    they are.
+    """
+
+    chunk: List[str] = []
+    size = 0
+
+    def emit(text: str) -> None:
+        nonlocal size
+        chunk.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            write("".join(chunk))
+            chunk.clear()
+            size = 0
+
+    def enter(node: Component) -> Optional[Iterator[Component]]:
+        if type(node).operation is not Composite.operation or node._cache is not None:
+            emit(node.operation())
+            return None
+        emit("Branch(")
+        return node.children()
+
+    children = enter(component)
+    stack = [[children, True]] if children is not None else []
+    while stack:
+        frame = stack[-1]
+        child = next(frame[0], _DONE)
+        if child is _DONE:
+            stack.pop()
+            emit(")")
+            continue
+        if not frame[1]:
+            emit("+")
+        frame[1] = False
+        children = enter(child)
+        if children is not None:
+            stack.append([children, True])
+    if chunk:
+        write("".join(chunk))
+
+
+class CompactTree:
+    """
+    A whole tree stored in a few arrays instead of one Python object per node.
+    Nodes are integer ids; each one takes a node kind byte and four integers:
+    its parent, its first and last child, and its next sibling (-1 for none).
+    That's 17 bytes per node, against a few hundred for a Leaf or Composite
+    object with its `__dict__` and child list.
+
+    The client code can still work with the nodes through CompactNode handles,
+    which implement the Component interface and are created on demand.
+    Aggregates over all subtrees are computed in a single pass over the arrays.
+    """
+
+    LEAF = 0
+    COMPOSITE = 1
+
+    def __init__(self) -> None:
+        self.kind = array("b")
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.last_child = array("i")
+        self.next_sibling = array("i")
+
+    @classmethod
+    def from_edges(cls, kinds: Sequence[int],
+                   edges: Iterable[Tuple[int, int]]) -> CompactTree:
+        """
+        Builds a tree from the kind of each node and (parent, child) edges,
+        listed in the order of the children. Raises ValueError if the edges
+        don't form a forest whose parents are all composites.
+        """
+
+        tree = cls()
+        count = len(kinds)
+        tree.kind = array("b", kinds)
+        for column in ("parent", "first_child", "last_child", "next_sibling"):
+            setattr(tree, column, array("i", [-1]) * count)
+        parent, first, last, sibling = (
+            tree.parent, tree.first_child, tree.last_child, tree.next_sibling)
+        for p, child in edges:
+            if tree.kind[p] != cls.COMPOSITE:
+                raise ValueError(f"Node {p} can't have children.")
+            if parent[child] >= 0:
+                raise ValueError(f"Node {child} already has a parent.")
+            parent[child] = p
+            if first[p] < 0:
+                first[p] = child
+            else:
+                sibling[last[p]] = child
+            last[p] = child
+        # The nodes of a cycle can't be reached from any root.
+        if len(tree._top_down_order()) != count:
+            raise ValueError("The edges contain a cycle.")
+        return tree
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def add_node(self, kind: int, parent: int = -1) -> int:
+        node = len(self.kind)
+        self.kind.append(kind)
+        for column in (self.parent, self.first_child, self.last_child,
+                       self.next_sibling):
+            column.append(-1)
+        if parent >= 0:
+            self.link(parent, node)
+        return node
+
+    def link(self, parent: int, child: int) -> None:
+        """
+        Appends a root node to the children of another node.
+        """
+
+        self.check_link(parent, child)
+        if self.parent[child] >= 0:
+            raise ValueError(f"Node {child} already has a parent.")
+        self.parent[child] = parent
+        if self.first_child[parent] < 0:
+            self.first_child[parent] = child
+        else:
+            self.next_sibling[self.last_child[parent]] = child
+        self.last_child[parent] = child
+
+    def check_link(self, parent: int, child: int) -> None:
+        """
+        Raises ValueError if `parent` is a leaf or lies in the subtree of
+        `child`, as linking them would then make a cycle.
+        """
+
+        if self.kind[parent] != self.COMPOSITE:
+            raise ValueError(f"Node {parent} can't have children.")
+        node = parent
+        while node >= 0:
+            if node == child:
+                raise ValueError(f"Node {parent} is in the subtree of node {child}.")
+            node = self.parent[node]
+
+    def unlink(self, child: int) -> None:
+        """
+        Detaches a node, with its subtree, from its parent.
+        """
+
+        parent = self.parent[child]
+        if parent < 0:
+            return
+        previous, node = -1, self.first_child[parent]
+        while node != child:
+            previous, node = node, self.next_sibling[node]
+        following = self.next_sibling[child]
+        if previous < 0:
+            self.first_child[parent] = following
+        else:
+            self.next_sibling[previous] = following
+        if self.last_child[parent] == child:
+            self.last_child[parent] = previous
+        self.parent[child] = self.next_sibling[child] = -1
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def _top_down_order(self) -> array:
+        # Every node comes after its parent, so walking this order backwards
+        # visits every child before its parent.
+        order = array("i", (n for n in range(len(self.kind)) if self.parent[n] < 0))
+        first, sibling = self.first_child, self.next_sibling
+        index = 0
+        while index < len(order):
+            child = first[order[index]]
+            while child >= 0:
+                order.append(child)
+                child = sibling[child]
+            index += 1
+        return order
+
+    def subtree_sums(self, values: Sequence[int]) -> array:
+        """
+        Returns, for every node, the sum of the values of its whole subtree.
+
+        This is a single pass over the arrays in plain Python, not a vectorized
+        computation: it saves building and walking the node objects, but each
+        node still costs a few interpreted steps.
+        """
+
+        sums = array("q", values)
+        parent = self.parent
+        for node in reversed(self._top_down_order()):
+            if parent[node] >= 0:
+                sums[parent[node]] += sums[node]
+        return sums
+
+    def subtree_sizes(self) -> array:
+        return self.subtree_sums(array("q", [1]) * len(self.kind))
+
+    def leaf_counts(self) -> array:
+        return self.subtree_sums([kind == self.LEAF for kind in self.kind])
+
+    def operation(self, node: int) -> str:
+        """
+        Returns the same text as `Composite.operation()` for a node's subtree,
+        without recursion.
+        """
+
+        if self.kind[node] == self.LEAF:
+            return "Leaf"
+        parts = ["Branch("]
+        first, sibling, kind = self.first_child, self.next_sibling, self.kind
+        stack = [first[node]]
+        while stack:
+            child = stack[-1]
+            if child < 0:
+                stack.pop()
+                parts.append(")")
+                if stack:
+                    stack[-1] = sibling[stack[-1]]
+                    if stack[-1] >= 0:
+                        parts.append("+")
+            elif kind[child] == self.LEAF:
+                parts.append("Leaf")
+                stack[-1] = sibling[child]
+                if stack[-1] >= 0:
+                    parts.append("+")
+            else:
+                parts.append("Branch(")
+                stack.append(first[child])
+        return "".join(parts)
+
+    def node(self, node: int) -> CompactNode:
+        return CompactNode(self, node)
+
+
+class CompactNode(Component):
+    """
+    A lightweight handle to a node of a CompactTree that lets the client code
+    treat it as any other Component. Handles don't hold any state of their
+    own, so two handles to the same node are equal.
+    """
+
+    def __init__(self, tree: CompactTree, node: int) -> None:
+        self._tree = tree
+        self._node = node
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactNode):
+            return NotImplemented
+        return other._tree is self._tree and other._node == self._node
+
+    def __hash__(self) -> int:
+        return hash((id(self._tree), self._node))
+
+    @property
+    def parent(self) -> Optional[CompactNode]:
+        parent = self._tree.parent[self._node]
+        return CompactNode(self._tree, parent) if parent >= 0 else None
+
+    @parent.setter
+    def parent(self, parent: Optional[CompactNode]) -> None:
+        # Checked before unlinking, so that a refused parent leaves the node
+        # where it was.
+        if parent is not None:
+            if not isinstance(parent, CompactNode) or parent._tree is not self._tree:
+                raise TypeError("Only a node of the same CompactTree can be the parent.")
+            self._tree.check_link(parent._node, self._node)
+        self._tree.unlink(self._node)
+        if parent is not None:
+            self._tree.link(parent._node, self._node)
+
+    def add(self, component: Component) -> None:
+        if not isinstance(component, CompactNode) or component._tree is not self._tree:
+            raise TypeError("Only nodes of the same CompactTree can be added.")
+        component.parent = self
+
+    def remove(self, component: Component) -> None:
+        if component.parent != self:
+            raise ValueError("The component isn't a child of this node.")
+        component.parent = None
+
+    def is_composite(self) -> bool:
+        return self._tree.kind[self._node] == CompactTree.COMPOSITE
+
+    def children(self) -> Iterator[Component]:
+        return (CompactNode(self._tree, child)
+                for child in self._tree.children(self._node))
+
+    def invalidate(self) -> None:
+        pass
+
+    def operation(self) -> str:
+        return self._tree.operation(self._node)
 
 
 def client_code(component: Component) -> None:
@@ -138,7 +841,10 @@ def client_code2(component1: Component, component2: Component) -> None:
     print(f"RESULT: {component1.operation()}", end="")
 
 
-if __name__ == "__main__":
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    benchmark_parallel_operation()
+
+elif __name__ == "__main__":
     # This way the client code can support the simple leaf components...
     simple = Leaf()
     print("Client: I've got a simple component:")
@@ -164,3 +870,19 @@ if __name__ == "__main__":
 
     print("Client: I don't need to check the components classes even when managing the tree:")
     client_code2(tree, simple)
+    print("\n")
+
+    # The same tree can be stored in arrays, and the client code still works
+    # with it through handles.
+    LEAF, COMPOSITE = CompactTree.LEAF, CompactTree.COMPOSITE
+    compact = CompactTree.from_edges(
+        [COMPOSITE, COMPOSITE, LEAF, LEAF, COMPOSITE, LEAF],
+        [(0, 1), (1, 2), (1, 3), (0, 4), (4, 5)])
+    print("Client: Now I've got a compact tree:")
+    client_code(compact.node(0))
+    print("\n")
+
+    # Big trees with expensive leaves can be evaluated in parallel.
+    print("Client: The composite tree, evaluated in parallel:")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        print(f"RESULT: {parallel_operation(tree, executor, 2, min_size=1)}", end="")
@@ -8,7 +8,20 @@ data in each object.
 
 
 import json
-from typing import Dict
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import weakref
+import zlib
+from threading import Lock, Thread
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from json.encoder import encode_basestring_ascii
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 
 class Flyweight():
@@ -17,8 +30,13 @@ class Flyweight():
     state) that belongs to multiple real business entities. The Flyweight
     accepts the rest of the state (extrinsic state, unique for each entity) via
     its method parameters.
+
+    Flyweights exist in huge numbers, so they declare `__slots__` to get rid of
+    the per-instance `__dict__`.
     """
 
+    __slots__ = ("_shared_state", "__weakref__")
+
     def __init__(self, shared_state: str) -> None:
         self._shared_state = shared_state
 
@@ -70,6 +88,652 @@ class FlyweightFactory():
         print("\n".join(map(str, self._flyweights.keys())), end="")
 
 
+class InternedFlyweightFactory(FlyweightFactory):
+    """
+    A Flyweight Factory tuned for very large data sets. Unlike the base factory,
+    it keeps its flyweights in a per-factory dictionary, keys them with tuples
+    of interned strings instead of building a new joined string on every
+    lookup, and doesn't print anything on the hot path. Instead, it counts hits
+    and misses, so you can check how well the sharing works with
+    `memory_report()`.
+
+    Note that the key keeps the order of the state fields (brand, model, color),
+    so the shared state is stored exactly as the client passed it.
+    """
+
+    def __init__(self, initial_flyweights: Iterable[Sequence[str]] = ()) -> None:
+        self._flyweights: Dict[Tuple[str, ...], Flyweight] = {}
+        self.hits = 0
+        self.misses = 0
+        for state in initial_flyweights:
+            key = self.get_key(state)
+            self._flyweights[key] = Flyweight(key)
+
+    def get_key(self, state: Sequence[str]) -> Tuple[str, ...]:
+        """
+        Returns a Flyweight's hashable key for a given state. The strings are
+        interned, so equal states share the very same string objects.
+        """
+
+        return tuple(map(sys.intern, state))
+
+    def get_flyweight(self, shared_state: Sequence[str]) -> Flyweight:
+        """
+        Returns an existing Flyweight with a given state or creates a new one.
+        """
+
+        key = tuple(shared_state)
+        flyweight = self._flyweights.get(key)
+        if flyweight is not None:
+            self.hits += 1
+            return flyweight
+
+        self.misses += 1
+        key = self.get_key(key)
+        flyweight = self._flyweights[key] = Flyweight(key)
+        return flyweight
+
+    def get_many(self, shared_states: Iterable[Sequence[str]]) -> List[Flyweight]:
+        """
+        Resolves a whole batch of shared states in one pass. The batch is
+        deduplicated first, so every distinct state is looked up only once.
+        """
+
+        resolved: Dict[Tuple[str, ...], Flyweight] = {}
+        keys = [tuple(state) for state in shared_states]
+        get = self.get_flyweight
+        for key in keys:
+            if key not in resolved:
+                resolved[key] = get(key)
+        self.hits += len(keys) - len(resolved)
+        return [resolved[key] for key in keys]
+
+    def memory_report(self) -> Dict[str, float]:
+        """
+        Measures how much memory the flyweights take and how often they are
+        reused. The strings are counted once per distinct object, since interned
+        strings are shared between flyweights.
+        """
+
+        count = len(self._flyweights)
+        seen = set()
+        total = 0
+        for key, flyweight in self._flyweights.items():
+            total += sys.getsizeof(flyweight) + sys.getsizeof(key)
+            for value in key:
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+        lookups = self.hits + self.misses
+        return {
+            "flyweights": count,
+            "total_bytes": total,
+            "bytes_per_flyweight": total / count if count else 0.0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def keys(self) -> Iterator[Tuple[str, ...]]:
+        return iter(self._flyweights)
+
+    def list_flyweights(self) -> None:
+        keys = list(self.keys())
+        print(f"FlyweightFactory: I have {len(keys)} flyweights:")
+        print("\n".join("_".join(key) for key in keys), end="")
+
+    def snapshot(self, path: str) -> None:
+        """
+        Saves the intrinsic state of all flyweights to a compact binary file
+        that `MappedFlyweightFactory` can open without parsing it. See
+        `MappedFlyweightFactory` for the file layout.
+        """
+
+        records = [_encode_key(key) for key in self.keys()]
+        slots = 2
+        while slots < 2 * len(records):
+            slots *= 2
+        table = array("I", bytes(4 * slots))
+        ends = array("Q")
+        end = 0
+        for index, record in enumerate(records):
+            slot = zlib.crc32(record) & (slots - 1)
+            while table[slot]:
+                slot = (slot + 1) & (slots - 1)
+            table[slot] = index + 1
+            end += len(record)
+            ends.append(end)
+
+        with open(path, "wb") as file:
+            file.write(_SNAPSHOT_HEADER.pack(
+                _SNAPSHOT_MAGIC, len(records), slots, end))
+            file.write(table.tobytes())
+            file.write(ends.tobytes())
+            file.writelines(records)
+
+
+class ConcurrentFlyweightFactory(InternedFlyweightFactory):
+    """
+    A Flyweight Factory that many threads can share. Looking up an existing
+    flyweight is a single dictionary read and never takes a lock. Only a miss
+    does: the factory picks one of its lock stripes by the key's hash, checks
+    the dictionary again under that lock and creates the flyweight only if no
+    other thread did it in the meantime. Threads creating different flyweights
+    rarely wait for each other, and no state ever gets two flyweights.
+
+    The hit counter is updated without a lock, so it's approximate under
+    contention. The miss counter has a lock of its own, since misses on
+    different stripes may happen at the same time; it's exact.
+    """
+
+    def __init__(self, initial_flyweights: Iterable[Sequence[str]] = (),
+                 stripes: int = 16) -> None:
+        super().__init__(initial_flyweights)
+        self._locks = [Lock() for _ in range(stripes)]
+        self._misses_lock = Lock()
+
+    def get_flyweight(self, shared_state: Sequence[str]) -> Flyweight:
+        """
+        Returns an existing Flyweight with a given state or creates a new one.
+        """
+
+        key = tuple(shared_state)
+        flyweight = self._flyweights.get(key)
+        if flyweight is not None:
+            self.hits += 1
+            return flyweight
+
+        with self._locks[hash(key) % len(self._locks)]:
+            flyweight = self._flyweights.get(key)
+            if flyweight is None:
+                with self._misses_lock:
+                    self.misses += 1
+                key = self.get_key(key)
+                flyweight = self._flyweights[key] = Flyweight(key)
+                return flyweight
+        self.hits += 1
+        return flyweight
+
+
+def benchmark_concurrent_factory(lookups: int = 400_000, distinct: int = 1_000,
+                                 thread_counts: Sequence[int] = (1, 4, 16)) -> None:
+    """
+    Compares the lookup throughput of the single-threaded factory with the
+    concurrent one when the same lookups are split between several threads.
+    """
+
+    states = [(f"Brand{i % 7}", f"Model{i}", "red") for i in range(distinct)]
+    batch = [states[i % distinct] for i in range(lookups)]
+
+    def run(factory: InternedFlyweightFactory, threads: int) -> float:
+        chunk = len(batch) // threads
+
+        def work(part: List[Tuple[str, ...]]) -> None:
+            get = factory.get_flyweight
+            for state in part:
+                get(state)
+
+        workers = [Thread(target=work, args=(batch[i * chunk:(i + 1) * chunk],))
+                   for i in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return chunk * threads / (time.perf_counter() - start)
+
+    baseline = run(InternedFlyweightFactory(), 1)
+    print(f"InternedFlyweightFactory, 1 thread: {baseline:,.0f} lookups/s")
+    for threads in thread_counts:
+        factory = ConcurrentFlyweightFactory()
+        throughput = run(factory, threads)
+        print(f"ConcurrentFlyweightFactory, {threads} threads: "
+              f"{throughput:,.0f} lookups/s ({throughput / baseline:.2f}x), "
+              f"{factory.misses} flyweights created for {distinct} states")
+
+
+_SNAPSHOT_MAGIC = b"FLYW"
+_SNAPSHOT_HEADER = struct.Struct("<4sIIQ4x")
+_FIELD_SEPARATOR = "\x1f"
+
+
+def _encode_key(key: Tuple[str, ...]) -> bytes:
+    if any(_FIELD_SEPARATOR in field for field in key):
+        raise ValueError(f"Shared state can't contain {_FIELD_SEPARATOR!r}: {key!r}")
+    return _FIELD_SEPARATOR.join(key).encode()
+
+
+class MappedFlyweightFactory(InternedFlyweightFactory):
+    """
+    A Flyweight Factory that starts from a snapshot written by
+    `InternedFlyweightFactory.snapshot()`. The file is memory-mapped, so
+    opening it costs the same for a thousand flyweights or for millions of
+    them, and every process that opens the same file shares its pages.
+
+    The snapshot contains a header, an open-addressing hash table of record
+    numbers (keyed by the CRC-32 of the record), the end offsets of all records
+    and finally the records themselves: the fields of each shared state joined
+    with a unit separator. A Flyweight object is only created the first time a
+    client asks for its state. New states are kept in memory, as usual.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, count, slots, size = _SNAPSHOT_HEADER.unpack_from(view)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} isn't a flyweight snapshot.")
+        start = _SNAPSHOT_HEADER.size
+        self._table = view[start:start + 4 * slots].cast("I")
+        start += 4 * slots
+        self._ends = view[start:start + 8 * count].cast("Q")
+        start += 8 * count
+        self._records = view[start:start + size]
+        self._view = view
+        self._new_keys: List[Tuple[str, ...]] = []
+
+    def _record(self, index: int) -> memoryview:
+        start = self._ends[index - 1] if index else 0
+        return self._records[start:self._ends[index]]
+
+    def _find(self, record: bytes) -> bool:
+        mask = len(self._table) - 1
+        slot = zlib.crc32(record) & mask
+        while self._table[slot]:
+            if self._record(self._table[slot] - 1) == record:
+                return True
+            slot = (slot + 1) & mask
+        return False
+
+    def get_flyweight(self, shared_state: Sequence[str]) -> Flyweight:
+        """
+        Returns an existing Flyweight with a given state or creates a new one.
+        """
+
+        key = tuple(shared_state)
+        flyweight = self._flyweights.get(key)
+        if flyweight is not None:
+            self.hits += 1
+            return flyweight
+
+        # A state with a separator in it can't have been saved in a snapshot.
+        mapped = not any(_FIELD_SEPARATOR in field for field in key)
+        if mapped and self._find(_encode_key(key)):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._new_keys.append(key)
+        key = self.get_key(key)
+        flyweight = self._flyweights[key] = Flyweight(key)
+        return flyweight
+
+    def keys(self) -> Iterator[Tuple[str, ...]]:
+        for index in range(len(self._ends)):
+            record = bytes(self._record(index)).decode()
+            yield tuple(record.split(_FIELD_SEPARATOR))
+        yield from self._new_keys
+
+    def memory_report(self) -> Dict[str, float]:
+        report = super().memory_report()
+        report["mapped"] = len(self._ends)
+        report["mapped_bytes"] = len(self._mmap)
+        return report
+
+    def close(self) -> None:
+        for view in (self._table, self._ends, self._records, self._view):
+            view.release()
+        self._mmap.close()
+
+
+class EvictionPolicy(ABC):
+    """
+    The Eviction Policy decides which flyweight a bounded factory forgets first
+    once it's full. The factory reports every hit and insertion to the policy
+    and asks it for a victim when it needs room.
+    """
+
+    @abstractmethod
+    def touch(self, key: Hashable) -> None:
+        pass
+
+    @abstractmethod
+    def insert(self, key: Hashable) -> None:
+        pass
+
+    @abstractmethod
+    def victim(self) -> Hashable:
+        """
+        Removes the next key to evict from the policy and returns it.
+        """
+        pass
+
+    def expired(self) -> List[Hashable]:
+        """
+        Removes the keys that must be evicted regardless of the capacity and
+        returns them. Only time-based policies have any.
+        """
+
+        return []
+
+
+class LRUPolicy(EvictionPolicy):
+    """
+    Evicts the least recently used flyweight.
+    """
+
+    def __init__(self) -> None:
+        self._keys: OrderedDict = OrderedDict()
+
+    def touch(self, key: Hashable) -> None:
+        self._keys.move_to_end(key)
+
+    def insert(self, key: Hashable) -> None:
+        self._keys[key] = None
+
+    def victim(self) -> Hashable:
+        return self._keys.popitem(last=False)[0]
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Evicts the least frequently used flyweight, and the least recently used one
+    among those with the same frequency. Keys are grouped in buckets by their
+    frequency, so touching and inserting a key are O(1). Finding a victim is
+    O(1) too, except when the previous victim emptied the lowest bucket and no
+    key was inserted since: the next lowest bucket then takes a scan of all
+    of them. The bounded factory always inserts after evicting, so it never
+    pays for that scan.
+    """
+
+    def __init__(self) -> None:
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._min_count = 0
+
+    def touch(self, key: Hashable) -> None:
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def insert(self, key: Hashable) -> None:
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_count = 1
+
+    def victim(self) -> Hashable:
+        if self._min_count not in self._buckets:
+            self._min_count = min(self._buckets)
+        bucket = self._buckets[self._min_count]
+        key = bucket.popitem(last=False)[0]
+        if not bucket:
+            # The next lowest bucket is only looked for if it's needed.
+            del self._buckets[self._min_count]
+        del self._counts[key]
+        return key
+
+
+class TTLPolicy(EvictionPolicy):
+    """
+    Evicts the flyweights that haven't been used for `ttl` seconds. When the
+    factory is full before that, the one idle for the longest time goes first.
+    """
+
+    def __init__(self, ttl: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._ttl = ttl
+        self._clock = clock
+        self._deadlines: OrderedDict = OrderedDict()
+
+    def touch(self, key: Hashable) -> None:
+        self._deadlines[key] = self._clock() + self._ttl
+        self._deadlines.move_to_end(key)
+
+    def insert(self, key: Hashable) -> None:
+        self._deadlines[key] = self._clock() + self._ttl
+
+    def victim(self) -> Hashable:
+        return self._deadlines.popitem(last=False)[0]
+
+    def expired(self) -> List[Hashable]:
+        now = self._clock()
+        keys = []
+        while self._deadlines:
+            key, deadline = next(iter(self._deadlines.items()))
+            if deadline > now:
+                break
+            del self._deadlines[key]
+            keys.append(key)
+        return keys
+
+
+class WeakRefPolicy(EvictionPolicy):
+    """
+    Doesn't keep any flyweight alive by itself: a flyweight lives exactly as
+    long as some record refers to it. A factory with this policy has no strong
+    cache at all, so it ignores the capacity.
+    """
+
+    def touch(self, key: Hashable) -> None:
+        pass
+
+    def insert(self, key: Hashable) -> None:
+        pass
+
+    def victim(self) -> Hashable:
+        raise LookupError("WeakRefPolicy never holds any flyweight.")
+
+
+class BoundedFlyweightFactory(InternedFlyweightFactory):
+    """
+    A Flyweight Factory that holds at most `capacity` flyweights and uses an
+    Eviction Policy to choose which ones to forget.
+
+    Evicting a flyweight must not break the sharing: if some record still uses
+    it, the next request for the same state has to return the very same object.
+    That's why the factory also remembers every flyweight with a weak reference.
+    An evicted flyweight that is still alive is simply brought back to the
+    cache, and only the ones nobody refers to anymore are really gone.
+    """
+
+    def __init__(self, initial_flyweights: Iterable[Sequence[str]] = (),
+                 capacity: int = 1024,
+                 policy: Optional[EvictionPolicy] = None) -> None:
+        self._policy = policy if policy is not None else LRUPolicy()
+        self._capacity = 0 if isinstance(self._policy, WeakRefPolicy) else capacity
+        self._alive: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self.evictions = 0
+        self.resurrections = 0
+        super().__init__()
+        for state in initial_flyweights:
+            self.get_flyweight(state)
+        self.hits = self.misses = 0
+
+    def get_flyweight(self, shared_state: Sequence[str]) -> Flyweight:
+        """
+        Returns an existing Flyweight with a given state or creates a new one.
+        """
+
+        for expired in self._policy.expired():
+            del self._flyweights[expired]
+            self.evictions += 1
+
+        key = tuple(shared_state)
+        flyweight = self._flyweights.get(key)
+        if flyweight is not None:
+            self.hits += 1
+            self._policy.touch(key)
+            return flyweight
+
+        flyweight = self._alive.get(key)
+        if flyweight is not None:
+            self.hits += 1
+            self.resurrections += 1
+        else:
+            self.misses += 1
+            flyweight = Flyweight(self.get_key(key))
+            self._alive[flyweight._shared_state] = flyweight
+
+        if self._capacity:
+            # The victim is chosen before the new flyweight is inserted, or a
+            # frequency-based policy would always pick the newcomer.
+            while len(self._flyweights) >= self._capacity:
+                del self._flyweights[self._policy.victim()]
+                self.evictions += 1
+            self._flyweights[flyweight._shared_state] = flyweight
+            self._policy.insert(flyweight._shared_state)
+        return flyweight
+
+    def memory_report(self) -> Dict[str, float]:
+        report = super().memory_report()
+        report["alive"] = len(self._alive)
+        report["evictions"] = self.evictions
+        report["resurrections"] = self.resurrections
+        return report
+
+
+class StringColumn():
+    """
+    A compact column of strings: all values are stored back to back in a single
+    UTF-8 buffer, and an array of offsets marks where each of them ends. This
+    costs a few bytes per value instead of a full Python string object.
+    """
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._ends = array("Q")
+
+    def append(self, value: str) -> None:
+        self._data += value.encode()
+        self._ends.append(len(self._data))
+
+    def __getitem__(self, row: int) -> str:
+        start = self._ends[row - 1] if row else 0
+        return self._data[start:self._ends[row]].decode()
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def nbytes(self) -> int:
+        return len(self._data) + self._ends.itemsize * len(self._ends)
+
+
+class ExtrinsicStore():
+    """
+    The Extrinsic Store keeps the unique state of all entities outside of the
+    flyweights, in columns. Each row holds the plates and the owner of a car
+    and a small integer that points to the car's flyweight.
+
+    The integer ids are local to the store: the store keeps a palette of the
+    flyweights it uses, so the id column stays compact whatever the size of
+    the factory. Since the columns are plain arrays, scanning or filtering
+    millions of cars by their shared state doesn't touch any Python objects
+    except the handful of flyweights.
+    """
+
+    SHARED_FIELDS = ("brand", "model", "color")
+
+    def __init__(self, factory: InternedFlyweightFactory) -> None:
+        self._factory = factory
+        self._palette: List[Flyweight] = []
+        self._palette_ids: Dict[int, int] = {}
+        self._flyweight_ids = array("I")
+        self._plates = StringColumn()
+        self._owners = StringColumn()
+
+    def _palette_id(self, flyweight: Flyweight) -> int:
+        palette_id = self._palette_ids.get(id(flyweight))
+        if palette_id is None:
+            palette_id = self._palette_ids[id(flyweight)] = len(self._palette)
+            self._palette.append(flyweight)
+        return palette_id
+
+    def add(self, plates: str, owner: str, brand: str, model: str,
+            color: str) -> int:
+        """
+        Adds a single car and returns its row number.
+        """
+
+        flyweight = self._factory.get_flyweight((brand, model, color))
+        self._flyweight_ids.append(self._palette_id(flyweight))
+        self._plates.append(plates)
+        self._owners.append(owner)
+        return len(self._flyweight_ids) - 1
+
+    def add_many(self, records: Iterable[Sequence[str]]) -> None:
+        """
+        Adds a batch of (plates, owner, brand, model, color) records, resolving
+        all of their flyweights at once. The whole batch is checked first, so
+        a malformed record leaves the store unchanged.
+        """
+
+        records = list(records)
+        width = 2 + len(self.SHARED_FIELDS)
+        if any(len(record) != width for record in records):
+            raise ValueError(f"Every record must have {width} fields.")
+        flyweights = self._factory.get_many(record[2:] for record in records)
+        palette_id = self._palette_id
+        self._flyweight_ids.extend(palette_id(f) for f in flyweights)
+        for plates, owner, *_ in records:
+            self._plates.append(plates)
+            self._owners.append(owner)
+
+    def __len__(self) -> int:
+        return len(self._flyweight_ids)
+
+    def flyweight(self, row: int) -> Flyweight:
+        return self._palette[self._flyweight_ids[row]]
+
+    def select(self, **shared_state: str) -> List[int]:
+        """
+        Returns the rows whose shared state matches all given fields, e.g.
+        `store.select(brand="BMW", color="red")`. The filter is evaluated once
+        per flyweight, then the id column is scanned.
+        """
+
+        positions = [(self.SHARED_FIELDS.index(field), value)
+                     for field, value in shared_state.items()]
+        matching = {
+            palette_id for palette_id, flyweight in enumerate(self._palette)
+            if all(flyweight._shared_state[i] == value
+                   for i, value in positions)
+        }
+        return [row for row, palette_id in enumerate(self._flyweight_ids)
+                if palette_id in matching]
+
+    def operation_batch(self, rows: Optional[Iterable[int]] = None) -> List[str]:
+        """
+        Renders the same text as `Flyweight.operation` for many rows at once.
+        The shared part is encoded once per flyweight rather than once per row.
+        """
+
+        if rows is None:
+            rows = range(len(self))
+        shared = [json.dumps(f._shared_state) for f in self._palette]
+        ids, plates, owners = self._flyweight_ids, self._plates, self._owners
+        encode = encode_basestring_ascii
+        return [
+            f"Flyweight: Displaying shared ({shared[ids[row]]}) and unique "
+            f"([{encode(plates[row])}, {encode(owners[row])}]) state."
+            for row in rows
+        ]
+
+    def nbytes(self) -> int:
+        """
+        Returns the size of the columns in bytes.
+        """
+
+        ids = self._flyweight_ids.itemsize * len(self._flyweight_ids)
+        return ids + self._plates.nbytes() + self._owners.nbytes()
+
+
 def add_car_to_police_database(
     factory: FlyweightFactory, plates: str, owner: str,
     brand: str, model: str, color: str
@@ -81,19 +745,23 @@ def add_car_to_police_database(
     flyweight.operation([plates, owner])
 
 
-if __name__ == "__main__":
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    benchmark_concurrent_factory()
+
+elif __name__ == "__main__":
     """
     The client code usually creates a bunch of pre-populated flyweights in the
     initialization stage of the application.
     """
 
-    factory = FlyweightFactory([
+    initial_flyweights = [
         ["Chevrolet", "Camaro2018", "pink"],
         ["Mercedes Benz", "C300", "black"],
         ["Mercedes Benz", "C500", "red"],
         ["BMW", "M5", "red"],
         ["BMW", "X6", "white"],
-    ])
+    ]
+    factory = FlyweightFactory(initial_flyweights)
 
     factory.list_flyweights()
 
@@ -106,3 +774,55 @@ if __name__ == "__main__":
     print("\n")
 
     factory.list_flyweights()
+
+    print("\n")
+
+    # When there are millions of records, the client resolves the shared state
+    # of a whole batch at once and checks how much memory the sharing saves.
+    interned_factory = InternedFlyweightFactory()
+    cars = [["BMW", "M5", "red"], ["BMW", "X6", "white"]] * 50_000
+    interned_factory.get_many(cars)
+    report = interned_factory.memory_report()
+    print(f"InternedFlyweightFactory: {report['flyweights']} flyweights "
+          f"serve {len(cars)} cars, hit ratio {report['hit_ratio']:.5f}.", end="")
+
+    print("\n")
+
+    # The unique state of each car can be kept in columns, next to the
+    # factory, instead of being passed around one record at a time.
+    store = ExtrinsicStore(interned_factory)
+    store.add_many([
+        ("CL234IR", "James Doe", "BMW", "M5", "red"),
+        ("XY875KL", "Jane Roe", "BMW", "X6", "white"),
+        ("AB123CD", "John Smith", "BMW", "M5", "red"),
+    ])
+    print("\n".join(store.operation_batch(store.select(model="M5"))), end="")
+
+    print("\n")
+
+    # A long-running service bounds the factory. The red M5 gets evicted, but
+    # since the client still holds it, asking for it again returns the same
+    # object.
+    bounded_factory = BoundedFlyweightFactory(capacity=2, policy=LRUPolicy())
+    red_m5 = bounded_factory.get_flyweight(["BMW", "M5", "red"])
+    bounded_factory.get_flyweight(["BMW", "X6", "white"])
+    bounded_factory.get_flyweight(["BMW", "X1", "red"])
+    same = bounded_factory.get_flyweight(["BMW", "M5", "red"]) is red_m5
+    report = bounded_factory.memory_report()
+    print(f"BoundedFlyweightFactory: {report['evictions']} evictions, "
+          f"same red M5 after eviction: {same}.", end="")
+
+    print("\n")
+
+    # The pre-populated pool can be saved once and memory-mapped on the next
+    # start, or by sibling worker processes, instead of being rebuilt.
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "flyweights.bin")
+        InternedFlyweightFactory(initial_flyweights).snapshot(path)
+        mapped_factory = MappedFlyweightFactory(path)
+        mapped_factory.get_flyweight(["BMW", "X6", "white"])
+        mapped_factory.get_flyweight(["BMW", "X1", "red"])
+        report = mapped_factory.memory_report()
+        print(f"MappedFlyweightFactory: {report['mapped']} flyweights mapped, "
+              f"{report['hits']} hit and {report['misses']} miss.", end="")
+        mapped_factory.close()
@@ -7,10 +7,23 @@ revealing the details of its implementation.
 
 
 from __future__ import annotations
+import lzma
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+import zlib
 from abc import ABC, abstractmethod
-from datetime import datetime
-from random import sample
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from random import randrange, sample
 from string import ascii_letters, digits
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 
 class Originator():
@@ -60,6 +73,123 @@ class Originator():
         print(f"Originator: My state has changed to: {self._state}")
 
 
+class PersistentVector():
+    """
+    An immutable list. "Changing" it returns a new vector that shares all the
+    unchanged parts with the old one, so old versions remain valid and cost
+    almost nothing to keep.
+
+    The items live in the leaves of a tree where each node has up to 32
+    children (tuples). Reading, replacing or appending an item touches a single
+    path from the root, that is log32(n) nodes: at most 4 for a million items.
+    """
+
+    __slots__ = ("_count", "_shift", "_root")
+
+    _BITS = 5
+    _MASK = (1 << _BITS) - 1
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        self._count = 0
+        self._shift = 0
+        self._root: Tuple = ()
+        vector = self
+        for item in items:
+            vector = vector.append(item)
+        self._count, self._shift, self._root = (
+            vector._count, vector._shift, vector._root)
+
+    @classmethod
+    def _make(cls, count: int, shift: int, root: Tuple) -> PersistentVector:
+        vector = cls.__new__(cls)
+        vector._count, vector._shift, vector._root = count, shift, root
+        return vector
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Any:
+        index = range(self._count)[index]
+        node = self._root
+        for level in range(self._shift, 0, -self._BITS):
+            node = node[(index >> level) & self._MASK]
+        return node[index & self._MASK]
+
+    def __iter__(self) -> Iterator[Any]:
+        def walk(node: Tuple, level: int) -> Iterator[Any]:
+            if level == 0:
+                yield from node
+            else:
+                for child in node:
+                    yield from walk(child, level - self._BITS)
+
+        return walk(self._root, self._shift)
+
+    def __repr__(self) -> str:
+        return f"PersistentVector({list(self)!r})"
+
+    def set(self, index: int, value: Any) -> PersistentVector:
+        index = range(self._count)[index]
+
+        def assoc(node: Tuple, level: int) -> Tuple:
+            slot = (index >> level) & self._MASK
+            child = value if level == 0 else assoc(node[slot], level - self._BITS)
+            return node[:slot] + (child,) + node[slot + 1:]
+
+        return self._make(self._count, self._shift, assoc(self._root, self._shift))
+
+    def append(self, value: Any) -> PersistentVector:
+        index, root, shift = self._count, self._root, self._shift
+        if index == 1 << (shift + self._BITS):
+            root, shift = (root,), shift + self._BITS
+
+        def new_path(level: int) -> Tuple:
+            return (value,) if level == 0 else (new_path(level - self._BITS),)
+
+        def insert(node: Tuple, level: int) -> Tuple:
+            if level == 0:
+                return node + (value,)
+            slot = (index >> level) & self._MASK
+            if slot < len(node):
+                return node[:slot] + (insert(node[slot], level - self._BITS),)
+            return node + (new_path(level - self._BITS),)
+
+        return self._make(index + 1, shift, insert(root, shift))
+
+
+class PersistentOriginator(Originator):
+    """
+    An Originator whose state is a document made of lines, kept in a
+    PersistentVector. Since the state is immutable, saving it doesn't need a
+    copy: a memento simply refers to the current version, which shares all the
+    unchanged lines with the previous ones. Both `save()` and `restore()` are
+    O(1), cheap enough to back up after every keystroke.
+    """
+
+    def __init__(self, lines: Iterable[str] = ()) -> None:
+        self._state = PersistentVector(lines)
+        print(f"Originator: My initial state has {len(self._state)} lines.")
+
+    def append_line(self, line: str) -> None:
+        self._state = self._state.append(line)
+
+    def set_line(self, index: int, line: str) -> None:
+        self._state = self._state.set(index, line)
+
+    def do_something(self) -> None:
+        print("Originator: I'm changing one line of my document.")
+        index = randrange(len(self._state))
+        self.set_line(index, self._generate_random_string(30))
+        print(f"Originator: line {index} has changed to: {self._state[index]}")
+
+    def save(self) -> Memento:
+        return PersistentMemento(self._state)
+
+    def restore(self, memento: Memento) -> None:
+        self._state = memento.get_state()
+        print(f"Originator: My document is back to {len(self._state)} lines.")
+
+
 class Memento(ABC):
     """
     The Memento interface provides a way to retrieve the memento's metadata,
@@ -77,9 +207,9 @@ class Memento(ABC):
 
 
 class ConcreteMemento(Memento):
-    def __init__(self, state: str) -> None:
+    def __init__(self, state: str, date: Optional[str] = None) -> None:
         self._state = state
-        self._date = str(datetime.now())[:19]
+        self._date = date if date is not None else str(datetime.now())[:19]
 
     def get_state(self) -> str:
         """
@@ -98,6 +228,11 @@ class ConcreteMemento(Memento):
         return self._date
 
 
+class PersistentMemento(ConcreteMemento):
+    def get_name(self) -> str:
+        return f"{self._date} / ({len(self._state)} lines)"
+
+
 class Caretaker():
     """
     The Caretaker doesn't depend on the Concrete Memento class. Therefore, it
@@ -105,8 +240,14 @@ class Caretaker():
     works with all mementos via the base Memento interface.
     """
 
-    def __init__(self, originator: Originator) -> None:
-        self._mementos = []
+    def __init__(self, originator: Originator, mementos=None) -> None:
+        """
+        The mementos can be kept in any container that supports `append`,
+        `pop`, `len` and iteration, such as a DeltaMementoStore. By default,
+        it's a simple list.
+        """
+
+        self._mementos = mementos if mementos is not None else []
         self._originator = originator
 
     def backup(self) -> None:
@@ -114,15 +255,17 @@ class Caretaker():
         self._mementos.append(self._originator.save())
 
     def undo(self) -> None:
-        if not len(self._mementos):
-            return
-
-        memento = self._mementos.pop()
-        print(f"Caretaker: Restoring state to: {memento.get_name()}")
-        try:
-            self._originator.restore(memento)
-        except Exception:
-            self.undo()
+        # A memento that fails to restore is skipped, and the previous one is
+        # tried instead. A loop, rather than recursion, copes with any number
+        # of broken mementos in a row.
+        while len(self._mementos):
+            memento = self._mementos.pop()
+            print(f"Caretaker: Restoring state to: {memento.get_name()}")
+            try:
+                self._originator.restore(memento)
+                return
+            except Exception:
+                continue
 
     def show_history(self) -> None:
         print("Caretaker: Here's the list of mementos:")
@@ -130,6 +273,419 @@ class Caretaker():
             print(memento.get_name())
 
 
+class DeltaMementoStore():
+    """
+    A compact container for the Caretaker's mementos. Instead of a full copy of
+    the state per memento, it keeps a full keyframe every `keyframe_interval`
+    mementos and, in between, only the delta from the previous state: the
+    length of the common prefix and suffix and the bytes that changed.
+    Keyframes and deltas can also be compressed with "zlib" or "lzma" (each
+    record is only compressed if that makes it smaller).
+
+    Restoring a memento replays at most `keyframe_interval - 1` deltas on top
+    of the nearest keyframe, and a small edit of a large state costs only a few
+    bytes of history.
+
+    Since the store has to read the state to compute the deltas, it works with
+    ConcreteMemento objects. The Caretaker still sees it as a plain list.
+    """
+
+    _KEYFRAME = 1
+    _COMPRESSED = 2
+    _DELTA_HEADER = struct.Struct("<II")
+    _CODECS = {
+        "zlib": (zlib.compress, zlib.decompress),
+        "lzma": (lzma.compress, lzma.decompress),
+    }
+
+    def __init__(self, keyframe_interval: int = 32,
+                 compression: Optional[str] = None) -> None:
+        if compression is not None and compression not in self._CODECS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self._interval = keyframe_interval
+        self._codec = self._CODECS.get(compression)
+        self._records: List[bytes] = []
+        self._dates: List[str] = []
+        self._tip = b""
+
+    def _encode(self, flags: int, payload: bytes) -> bytes:
+        if self._codec is not None:
+            compressed = self._codec[0](payload)
+            if len(compressed) < len(payload):
+                return bytes((flags | self._COMPRESSED,)) + compressed
+        return bytes((flags,)) + payload
+
+    def _decode(self, record: bytes) -> bytes:
+        if record[0] & self._COMPRESSED:
+            return self._codec[1](record[1:])
+        return record[1:]
+
+    def _apply(self, state: bytes, record: bytes) -> bytes:
+        payload = self._decode(record)
+        if record[0] & self._KEYFRAME:
+            return payload
+        prefix, suffix = self._DELTA_HEADER.unpack_from(payload)
+        middle = payload[self._DELTA_HEADER.size:]
+        return state[:prefix] + middle + state[len(state) - suffix:]
+
+    def _diff(self, old: bytes, new: bytes) -> bytes:
+        limit = min(len(old), len(new))
+        prefix = 0
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+        middle = new[prefix:len(new) - suffix]
+        return self._DELTA_HEADER.pack(prefix, suffix) + middle
+
+    def _state_at(self, index: int) -> bytes:
+        state = b""
+        for record in self._records[index - index % self._interval:index + 1]:
+            state = self._apply(state, record)
+        return state
+
+    def append(self, memento: ConcreteMemento) -> None:
+        state = memento.get_state().encode()
+        if len(self._records) % self._interval == 0:
+            record = self._encode(self._KEYFRAME, state)
+        else:
+            record = self._encode(0, self._diff(self._tip, state))
+        self._records.append(record)
+        self._dates.append(memento.get_date())
+        self._tip = state
+
+    def pop(self) -> ConcreteMemento:
+        memento = ConcreteMemento(self._tip.decode(), self._dates[-1])
+        self._records.pop()
+        self._dates.pop()
+        self._tip = self._state_at(len(self._records) - 1) if self._records else b""
+        return memento
+
+    def __getitem__(self, index: int) -> ConcreteMemento:
+        index = range(len(self._records))[index]
+        return ConcreteMemento(self._state_at(index).decode(), self._dates[index])
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[ConcreteMemento]:
+        state = b""
+        for record, date in zip(self._records, self._dates):
+            state = self._apply(state, record)
+            yield ConcreteMemento(state.decode(), date)
+
+    def nbytes(self) -> int:
+        """
+        Returns the size of the stored keyframes and deltas.
+        """
+
+        return sum(map(len, self._records))
+
+
+class JournalMementoStore():
+    """
+    A container for the Caretaker's mementos that lives on disk. Every memento
+    is appended to a journal file as a length-prefixed record, and its offset
+    is appended to an index file next to it. Only the last `hot` mementos stay
+    in memory; the older ones are read back through a memory map, in O(1) by
+    their position. Reopening the same path after a restart brings the whole
+    history back.
+
+    Like DeltaMementoStore, it works with ConcreteMemento objects, and the
+    Caretaker uses it as a plain list.
+    """
+
+    _RECORD_HEADER = struct.Struct("<IH")
+
+    def __init__(self, path: str, hot: int = 16) -> None:
+        self._file = open(path, "a+b")
+        self._index_file = open(path + ".idx", "a+b")
+        self._index_file.seek(0)
+        self._offsets = array("Q", self._index_file.read())
+        self._mmap: Optional[mmap.mmap] = None
+        self._hot: deque = deque(maxlen=hot)
+
+    def _read(self, index: int) -> ConcreteMemento:
+        offset = self._offsets[index]
+        if self._mmap is None or offset >= len(self._mmap):
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        size, date_size = self._RECORD_HEADER.unpack_from(self._mmap, offset)
+        start = offset + self._RECORD_HEADER.size
+        date = self._mmap[start:start + date_size].decode()
+        state = self._mmap[start + date_size:start + size].decode()
+        return ConcreteMemento(state, date)
+
+    def append(self, memento: ConcreteMemento) -> None:
+        date = memento.get_date().encode()
+        state = memento.get_state().encode()
+        offset = self._file.seek(0, os.SEEK_END)
+        header = self._RECORD_HEADER.pack(len(date) + len(state), len(date))
+        self._file.write(header + date + state)
+        self._file.flush()
+        self._index_file.write(struct.pack("<Q", offset))
+        self._index_file.flush()
+        self._offsets.append(offset)
+        self._hot.append(memento)
+
+    def pop(self) -> ConcreteMemento:
+        memento = self[-1]
+        if self._hot:
+            self._hot.pop()
+        # The memory map can't outlive the part of the file it maps.
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.truncate(self._offsets.pop())
+        self._index_file.truncate(self._offsets.itemsize * len(self._offsets))
+        return memento
+
+    def __getitem__(self, index: int) -> ConcreteMemento:
+        index = range(len(self._offsets))[index]
+        hot_index = index - (len(self._offsets) - len(self._hot))
+        if hot_index >= 0:
+            return self._hot[hot_index]
+        return self._read(index)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[ConcreteMemento]:
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+        self._index_file.close()
+
+
+def _compress_memento(memento: Memento) -> bytes:
+    return zlib.compress(pickle.dumps(memento, pickle.HIGHEST_PROTOCOL))
+
+
+class AsyncCaretaker(Caretaker):
+    """
+    A Caretaker that doesn't make the business logic wait for the backups.
+    `backup()` only asks the Originator for a memento, which is cheap as long
+    as the state is immutable (a string or a PersistentVector), and returns a
+    future right away. A worker thread then serializes the memento (pickle and
+    zlib by default) and hands the bytes to `persist`.
+
+    When backups come faster than the worker can write them, a backup that is
+    still waiting in the queue is replaced by the newer one, and both callers
+    get the same future. The subject's latest state is what matters, not every
+    intermediate one.
+    """
+
+    def __init__(self, originator: Originator,
+                 serialize: Callable[[Memento], bytes] = _compress_memento,
+                 persist: Callable[[bytes], None] = lambda data: None) -> None:
+        super().__init__(originator)
+        self._serialize = serialize
+        self._persist = persist
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = Lock()
+        self._queued: Optional[Tuple[Memento, float, Future]] = None
+        self._last: Optional[Future] = None
+        self._latencies: List[float] = []
+        self.coalesced = 0
+
+    def backup(self) -> Future:
+        print("\nCaretaker: Saving Originator's state in the background...")
+        memento = self._originator.save()
+        with self._lock:
+            if self._queued is not None:
+                _, requested, future = self._queued
+                self._queued = (memento, requested, future)
+                self.coalesced += 1
+                return future
+            future = Future()
+            self._queued = (memento, time.perf_counter(), future)
+            self._last = future
+        self._executor.submit(self._write)
+        return future
+
+    def _write(self) -> None:
+        with self._lock:
+            memento, requested, future = self._queued
+            self._queued = None
+        try:
+            self._persist(self._serialize(memento))
+        except Exception as error:
+            future.set_exception(error)
+            return
+        with self._lock:
+            self._mementos.append(memento)
+            self._latencies.append(time.perf_counter() - requested)
+        future.set_result(memento)
+
+    def wait(self) -> None:
+        """
+        Blocks until all the backups requested so far are written.
+        """
+
+        if self._last is not None:
+            self._last.exception()
+
+    def undo(self) -> None:
+        self.wait()
+        super().undo()
+
+    def latency_percentiles(self, percentiles: Sequence[int] = (50, 95, 99)
+                            ) -> Dict[int, float]:
+        """
+        Returns the time between a backup request and the end of its write, in
+        seconds, for the given percentiles.
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return {}
+        return {p: latencies[min(len(latencies) - 1, len(latencies) * p // 100)]
+                for p in percentiles}
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+
+class RetentionRule(NamedTuple):
+    """
+    Mementos older than `age` are thinned out to at most one per `spacing`.
+    For example, RetentionRule(timedelta(days=1), timedelta(hours=1)) keeps
+    hourly snapshots after a day.
+    """
+
+    age: timedelta
+    spacing: timedelta
+
+
+class HistoryCaretaker(Caretaker):
+    """
+    A Caretaker for long sessions. It keeps at most `max_depth` mementos (the
+    oldest one is dropped first), and, optionally, at most `max_bytes` of them,
+    as measured by the `size_of` function. Retention rules thin out old
+    history; they are applied every `prune_every` backups, or when you call
+    `prune()`.
+
+    Undo and redo are O(1): both stacks are deques, and undoing a step saves
+    the current state on the redo stack, so it can be brought back.
+    """
+
+    def __init__(self, originator: Originator, max_depth: int = 1000,
+                 retention: List[RetentionRule] = (),
+                 max_bytes: Optional[int] = None,
+                 size_of: Callable[[Memento], int] = lambda memento: 0,
+                 prune_every: int = 64,
+                 clock: Callable[[], datetime] = datetime.now) -> None:
+        super().__init__(originator, deque())
+        self._redo: deque = deque()
+        self._sizes: deque = deque()
+        self._max_depth = max_depth
+        self._retention = sorted(retention, key=lambda rule: rule.age)
+        self._max_bytes = max_bytes
+        self._size_of = size_of
+        self._bytes = 0
+        self._prune_every = prune_every
+        self._backups = 0
+        self._clock = clock
+
+    def _push(self, memento: Memento) -> None:
+        size = self._size_of(memento)
+        self._mementos.append(memento)
+        self._sizes.append(size)
+        self._bytes += size
+        while self._over_limit():
+            self._mementos.popleft()
+            self._bytes -= self._sizes.popleft()
+
+    def _over_limit(self) -> bool:
+        if len(self._mementos) > self._max_depth:
+            return True
+        if self._max_bytes is None or len(self._mementos) == 1:
+            return False
+        return self._bytes > self._max_bytes
+
+    def _pop(self) -> Memento:
+        self._bytes -= self._sizes.pop()
+        return self._mementos.pop()
+
+    def backup(self) -> None:
+        print("\nCaretaker: Saving Originator's state...")
+        self._push(self._originator.save())
+        self._redo.clear()
+        self._backups += 1
+        if self._retention and self._backups % self._prune_every == 0:
+            self.prune()
+
+    def undo(self) -> bool:
+        """
+        Restores the latest memento that can be restored, skipping the broken
+        ones. Returns False if there was nothing to restore.
+        """
+
+        current = self._originator.save()
+        while self._mementos:
+            memento = self._pop()
+            print(f"Caretaker: Restoring state to: {memento.get_name()}")
+            try:
+                self._originator.restore(memento)
+            except Exception:
+                continue
+            self._redo.append(current)
+            return True
+        return False
+
+    def redo(self) -> bool:
+        """
+        Reapplies the latest undone state. Returns False if there was nothing
+        to redo.
+        """
+
+        current = self._originator.save()
+        while self._redo:
+            memento = self._redo.pop()
+            print(f"Caretaker: Redoing state: {memento.get_name()}")
+            try:
+                self._originator.restore(memento)
+            except Exception:
+                continue
+            self._push(current)
+            return True
+        return False
+
+    def prune(self) -> None:
+        """
+        Applies the retention rules. Walking from the newest memento to the
+        oldest, an old memento is kept only if no newer one was kept in the
+        same `spacing` interval.
+        """
+
+        now = self._clock()
+        kept = deque()
+        sizes = deque()
+        seen = set()
+        for memento, size in zip(reversed(self._mementos), reversed(self._sizes)):
+            date = datetime.fromisoformat(memento.get_date())
+            rule = None
+            for candidate in self._retention:
+                if now - date >= candidate.age:
+                    rule = candidate
+            if rule is not None:
+                bucket = (rule, int(date.timestamp() // rule.spacing.total_seconds()))
+                if bucket in seen:
+                    self._bytes -= size
+                    continue
+                seen.add(bucket)
+            kept.appendleft(memento)
+            sizes.appendleft(size)
+        self._mementos, self._sizes = kept, sizes
+
+
 if __name__ == "__main__":
     originator = Originator("Super-duper-super-puper-super.")
     caretaker = Caretaker(originator)
@@ -151,3 +707,59 @@ if __name__ == "__main__":
 
     print("\nClient: Once more!\n")
     caretaker.undo()
+
+    print("\nClient: Large states can be kept as compressed deltas.\n")
+    store = DeltaMementoStore(keyframe_interval=8, compression="zlib")
+    delta_caretaker = Caretaker(originator, store)
+    for _ in range(3):
+        delta_caretaker.backup()
+        originator.do_something()
+    delta_caretaker.undo()
+    print(f"Client: {len(store)} mementos take {store.nbytes()} bytes.", end="")
+
+    print("\n\nClient: Long histories can be spilled to disk.\n")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.journal")
+        journal = JournalMementoStore(path, hot=1)
+        journal_caretaker = Caretaker(originator, journal)
+        for _ in range(3):
+            journal_caretaker.backup()
+            originator.do_something()
+        journal.close()
+
+        journal = JournalMementoStore(path, hot=1)
+        print(f"\nClient: The journal still has {len(journal)} mementos after "
+              "reopening it.")
+        Caretaker(originator, journal).undo()
+        journal.close()
+
+    print("\n\nClient: A bounded history can also redo.\n")
+    history_caretaker = HistoryCaretaker(originator, max_depth=2)
+    for _ in range(3):
+        history_caretaker.backup()
+        originator.do_something()
+    print()
+    history_caretaker.show_history()
+    print()
+    history_caretaker.undo()
+    history_caretaker.redo()
+
+    print("\n\nClient: Immutable states are saved without copying them.\n")
+    document = PersistentOriginator(f"Line {i}" for i in range(100_000))
+    document_caretaker = Caretaker(document)
+    document_caretaker.backup()
+    document.do_something()
+    document_caretaker.backup()
+    document.do_something()
+    print()
+    document_caretaker.undo()
+
+    print("\n\nClient: Backups can be written in the background.")
+    async_caretaker = AsyncCaretaker(document)
+    async_caretaker.backup()
+    document.do_something()
+    async_caretaker.backup().result()
+    document.do_something()
+    print()
+    async_caretaker.undo()
+    async_caretaker.close()
@@ -20,9 +20,18 @@ el observador a menudo se denomina suscriptor y viceversa. También los verbos
 
 
 from __future__ import annotations
+import asyncio
+import multiprocessing
+import queue
+import time
+import traceback
+import weakref
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from random import randrange
-from typing import List
+from threading import Lock, Timer
+from inspect import ismethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 
 class Subject(ABC):
@@ -72,15 +81,19 @@ class ConcreteSubject(Subject):
     suscriptores, se almacena en esta variable.
     """
 
-    _observers: List[Observer] = []
+    _observers: List[Observer]
     """
     List of subscribers. In real life, the list of subscribers can be stored
-    more comprehensively (categorized by event type, etc.).
+    more comprehensively (categorized by event type, etc.). See TopicSubject.
     
     Lista de suscriptores. En la vida real, la lista de suscriptores se puede almacenar
     de forma más completa (categorizados por tipo de evento, etc.).    
     """
 
+    def __init__(self) -> None:
+        # Each subject has its own subscribers.
+        self._observers = []
+
     def attach(self, observer: Observer) -> None:
         print("Subject: Adjunto un observador.")
         self._observers.append(observer)
@@ -160,6 +173,503 @@ class ConcreteObserverB(Observer):
         print("ConcreteObserverB: Reacted to the event")
 
 
+class WeakSubject(Subject):
+    """
+    The Weak Subject only holds weak references to its subscribers, so it never
+    keeps an observer alive on its own. Short-lived observers that nobody
+    detached simply disappear, and the subject drops their dead references the
+    next time it notifies.
+
+    Besides Observer objects, you can attach any callable that takes the
+    subject, such as a function or a bound method like `widget.on_change`.
+    Bound methods are held through `weakref.WeakMethod`, since a plain weak
+    reference to a bound method would die immediately.
+
+    El Sujeto Débil solo guarda referencias débiles a sus suscriptores, por lo
+    que nunca mantiene vivo a un observador por sí mismo.
+    """
+
+    def __init__(self) -> None:
+        self._state: int = None
+        self._refs: Dict[weakref.ref, None] = {}
+        self.collected = 0
+
+    @staticmethod
+    def _ref(observer: Union[Observer, Callable]) -> weakref.ref:
+        if ismethod(observer):
+            return weakref.WeakMethod(observer)
+        return weakref.ref(observer)
+
+    def attach(self, observer: Union[Observer, Callable]) -> None:
+        print("WeakSubject: Adjunto un observador.")
+        self._refs[self._ref(observer)] = None
+
+    def detach(self, observer: Union[Observer, Callable]) -> None:
+        # Live weak references compare equal when their referents are equal.
+        del self._refs[self._ref(observer)]
+
+    def notify(self) -> None:
+        """
+        Activar una actualización en cada suscriptor vivo.
+        """
+
+        print("WeakSubject: Notificar a los observadores...")
+        for ref in list(self._refs):
+            observer = ref()
+            if observer is None:
+                del self._refs[ref]
+                self.collected += 1
+            elif isinstance(observer, Observer):
+                observer.update(self)
+            else:
+                observer(self)
+
+    def subscriber_stats(self) -> Tuple[int, int]:
+        """
+        Returns how many subscribers are alive and how many were collected and
+        pruned so far.
+        """
+
+        live = sum(1 for ref in self._refs if ref() is not None)
+        return live, self.collected
+
+    def some_business_logic(self) -> None:
+        print("\nWeakSubject: I'm doing something important.")
+        self._state = randrange(0, 10)
+
+        print(f"WeakSubject: My state has just changed to: {self._state}")
+        self.notify()
+
+
+class CoalescingSubject(ConcreteSubject):
+    """
+    The Coalescing Subject doesn't bother its observers with every intermediate
+    state. Changes made inside a `with subject.batch():` block, or within
+    `window` seconds of each other, are collected and the observers are updated
+    once, when the state has settled. Observers read the final state as usual,
+    and the list of (old, new) changes from `subject.changes`.
+
+    Without a batch or a window, every change is delivered immediately, just
+    like in ConcreteSubject.
+
+    El Sujeto Agrupador reúne los cambios rápidos de estado y notifica a los
+    observadores una sola vez, con el estado final.
+    """
+
+    def __init__(self, window: Optional[float] = None) -> None:
+        super().__init__()
+        self._window = window
+        self._timer: Optional[Timer] = None
+        self._timer_generation = 0
+        self._depth = 0
+        self._pending: List[Tuple[Any, Any]] = []
+        self._lock = Lock()
+        self.changes: List[Tuple[Any, Any]] = []
+        self.state_changes = 0
+        self.notifications = 0
+
+    def set_state(self, state: Any) -> None:
+        with self._lock:
+            self._pending.append((self._state, state))
+            self._state = state
+            self.state_changes += 1
+            if self._depth:
+                return
+            if self._window is not None:
+                # Every change restarts the countdown, so the observers are
+                # only updated once the state has been quiet for `window`.
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer_generation += 1
+                self._timer = Timer(self._window, self._expire,
+                                    args=(self._timer_generation,))
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def _expire(self, generation: int) -> None:
+        with self._lock:
+            # A timer that was restarted after it had already fired is stale.
+            if generation != self._timer_generation:
+                return
+        self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[CoalescingSubject]:
+        """
+        Holds back the notifications until the outermost batch is over.
+        """
+
+        with self._lock:
+            self._depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth -= 1
+                done = not self._depth
+            if done:
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        Delivers the pending changes, if there are any, in a single update.
+        Inside a batch, it does nothing: the batch delivers them when it ends.
+        """
+
+        with self._lock:
+            if self._depth:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            self.changes, self._pending = self._pending, []
+            self.notifications += 1
+        self.notify()
+
+    def some_business_logic(self) -> None:
+        print("\nCoalescingSubject: I'm doing something important, many times.")
+        with self.batch():
+            for _ in range(1000):
+                self.set_state(randrange(0, 10))
+
+        print(f"CoalescingSubject: {self.state_changes} state changes, "
+              f"{self.notifications} notification, final state {self._state}.")
+
+
+class SubjectSnapshot():
+    """
+    What observers in other processes receive instead of the subject itself: a
+    copy of the state that can be pickled and sent through a queue.
+    """
+
+    def __init__(self, state: Any) -> None:
+        self._state = state
+
+
+def _observer_process(observer: Observer, updates: multiprocessing.Queue) -> None:
+    while True:
+        snapshot = updates.get()
+        if snapshot is None:
+            break
+        # A failing update mustn't kill the process, or the observer would miss
+        # every later update and its queue would fill up.
+        try:
+            observer.update(snapshot)
+        except Exception:
+            traceback.print_exc()
+
+
+class ProcessFanOutSubject(Subject):
+    """
+    The Process Fan-Out Subject runs each observer in its own process, so
+    CPU-heavy observers work in parallel instead of waiting for each other
+    behind the GIL.
+
+    Each observer reads its updates from its own bounded queue, one at a time,
+    so it always sees them in the order they were published. When an observer
+    falls `max_pending` updates behind, `notify` blocks until it catches up
+    (back-pressure), or raises `queue.Full` after `put_timeout` seconds if a
+    timeout is given. Observers must be picklable.
+
+    An exception in an observer's update is printed by its process, which then
+    goes on with the next update. If an observer process dies anyway, the
+    subject stops sending it updates and lists it in `dead_observers()`.
+
+    El Sujeto de Difusión entre Procesos ejecuta cada observador en su propio
+    proceso, conservando el orden de las actualizaciones de cada uno.
+    """
+
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, max_pending: int = 1000,
+                 put_timeout: Optional[float] = None,
+                 stop_timeout: float = 5.0) -> None:
+        self._state: int = None
+        self._max_pending = max_pending
+        self._put_timeout = put_timeout
+        self._stop_timeout = stop_timeout
+        self._workers: Dict[Observer, Tuple[multiprocessing.Process, multiprocessing.Queue]] = {}
+        self._dead: List[Observer] = []
+
+    def attach(self, observer: Observer) -> None:
+        print("ProcessFanOutSubject: Adjunto un observador.")
+        updates = multiprocessing.Queue(self._max_pending)
+        process = multiprocessing.Process(
+            target=_observer_process, args=(observer, updates), daemon=True)
+        process.start()
+        self._workers[observer] = (process, updates)
+
+    def _put(self, process: multiprocessing.Process, updates: multiprocessing.Queue,
+             item: Any, timeout: Optional[float]) -> bool:
+        """
+        Puts an item in an observer's queue, waiting at most `timeout` seconds
+        (forever if None) for room. Returns False if the observer process is
+        dead, since nobody will ever make room in its queue.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._POLL_INTERVAL
+            if deadline is not None:
+                wait = max(0.0, min(wait, deadline - time.monotonic()))
+            try:
+                updates.put(item, timeout=wait)
+                return True
+            except queue.Full:
+                if not process.is_alive():
+                    return False
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+    def detach(self, observer: Observer) -> None:
+        """
+        Lets the observer process all updates it has already received, then
+        stops its process. A process that doesn't stop within `stop_timeout`
+        seconds is terminated.
+        """
+
+        process, updates = self._workers.pop(observer)
+        try:
+            self._put(process, updates, None, self._stop_timeout)
+        except queue.Full:
+            pass
+        process.join(self._stop_timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        updates.close()
+        updates.cancel_join_thread()
+
+    def close(self) -> None:
+        for observer in list(self._workers):
+            self.detach(observer)
+
+    def dead_observers(self) -> List[Observer]:
+        """
+        Returns the observers whose process died. They are detached.
+        """
+
+        return list(self._dead)
+
+    def notify(self) -> None:
+        print("ProcessFanOutSubject: Notificar a los observadores...")
+        snapshot = SubjectSnapshot(self._state)
+        for observer, (process, updates) in list(self._workers.items()):
+            if not process.is_alive() or not self._put(
+                    process, updates, snapshot, self._put_timeout):
+                self._dead.append(observer)
+                self.detach(observer)
+
+    def some_business_logic(self) -> None:
+        print("\nProcessFanOutSubject: I'm doing something important.")
+        self._state = randrange(0, 10)
+
+        print(f"ProcessFanOutSubject: My state has just changed to: {self._state}")
+        self.notify()
+
+
+class TopicSubject(Subject):
+    """
+    The Topic Subject keeps its subscribers categorized by event type. Every
+    topic has its own ordered set of observers (a dict with no values), so
+    attaching and detaching are O(1), and an event only reaches the observers
+    of its topic.
+
+    Topics are dotted names, such as "orders.created". An observer can also
+    subscribe to a prefix ("orders.*" receives "orders.created" and
+    "orders.eu.refunded") or to everything ("*"). Publishing an event looks up
+    the exact topic and each of its prefixes, so it costs O(topic depth +
+    matching subscribers), whatever the total number of subscribers.
+
+    El Sujeto por Temas guarda a sus suscriptores clasificados por tipo de
+    evento, de modo que cada evento solo llega a los observadores de su tema.
+    """
+
+    WILDCARD = "*"
+
+    def __init__(self) -> None:
+        self._state: int = None
+        self._topics: Dict[str, Dict[Observer, None]] = {}
+
+    def attach(self, observer: Observer, topic: str = WILDCARD) -> None:
+        print(f"TopicSubject: Adjunto un observador a {topic}.")
+        self._topics.setdefault(topic, {})[observer] = None
+
+    def detach(self, observer: Observer, topic: str = WILDCARD) -> None:
+        observers = self._topics.get(topic)
+        if observers is None or observer not in observers:
+            raise ValueError(f"The observer isn't subscribed to {topic}.")
+        del observers[observer]
+        if not observers:
+            del self._topics[topic]
+
+    def subscribers(self, topic: str) -> Iterator[Observer]:
+        """
+        Yields each observer of a topic once, exact subscribers first, then the
+        ones of ever wider prefixes.
+        """
+
+        parts = topic.split(".")
+        patterns = [topic] + [".".join(parts[:i] + [self.WILDCARD])
+                              for i in range(len(parts) - 1, -1, -1)]
+        buckets = [self._topics[p] for p in patterns if p in self._topics]
+        if len(buckets) == 1:
+            yield from buckets[0]
+            return
+
+        seen = set()
+        for observers in buckets:
+            for observer in observers:
+                if observer not in seen:
+                    seen.add(observer)
+                    yield observer
+
+    def notify(self, topic: str = WILDCARD) -> None:
+        """
+        Activar una actualización en cada suscriptor del tema.
+        """
+
+        print(f"TopicSubject: Notificar a los observadores de {topic}...")
+        for observer in list(self.subscribers(topic)):
+            observer.update(self)
+
+    def some_business_logic(self, topic: str = WILDCARD) -> None:
+        print(f"\nTopicSubject: I'm doing something important ({topic}).")
+        self._state = randrange(0, 10)
+
+        print(f"TopicSubject: My state has just changed to: {self._state}")
+        self.notify(topic)
+
+
+class AsyncObserver(ABC):
+    """
+    The Async Observer interface declares a coroutine version of the update
+    method, so that slow subscribers (for instance, the ones that talk to SNS)
+    can wait for I/O without blocking anybody else.
+
+    La interfaz Async Observer declara una versión corrutina del método de
+    actualización, para que los suscriptores lentos no bloqueen a los demás.
+    """
+
+    @abstractmethod
+    async def update(self, subject: AsyncSubject) -> None:
+        pass
+
+
+class AsyncSubject(Subject):
+    """
+    The Async Subject notifies all its observers at the same time. The time it
+    takes to publish an event is the time of the slowest observer (or the
+    timeout), not the sum of all of them.
+
+    Every observer gets at most `timeout` seconds to react, and no more than
+    `max_concurrency` updates run at once. An observer that times out or fails
+    doesn't affect the other ones: the subject counts it, and prints and keeps
+    the errors of the failed ones in `errors`.
+
+    El Sujeto Asíncrono notifica a todos sus observadores al mismo tiempo, con
+    un tiempo límite por observador y una concurrencia máxima.
+    """
+
+    def __init__(self, timeout: Optional[float] = None,
+                 max_concurrency: Optional[int] = None) -> None:
+        self._state: int = None
+        self._observers: List[AsyncObserver] = []
+        self._timeout = timeout
+        self._max_concurrency = max_concurrency
+        # A semaphore belongs to the event loop it's first used in, so each
+        # loop that notifies the subject gets its own.
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._pending: Set[asyncio.Future] = set()
+        self.timeouts = 0
+        self.failures = 0
+        self.errors: List[Tuple[AsyncObserver, Exception]] = []
+
+    def attach(self, observer: AsyncObserver) -> None:
+        print("AsyncSubject: Adjunto un observador.")
+        self._observers.append(observer)
+
+    def detach(self, observer: AsyncObserver) -> None:
+        self._observers.remove(observer)
+
+    async def _deliver(self, observer: AsyncObserver,
+                       semaphore: Optional[asyncio.Semaphore]) -> None:
+        try:
+            if semaphore is None:
+                await asyncio.wait_for(observer.update(self), self._timeout)
+            else:
+                async with semaphore:
+                    await asyncio.wait_for(observer.update(self), self._timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+        except Exception as error:
+            self.failures += 1
+            self.errors.append((observer, error))
+            traceback.print_exc()
+
+    async def notify(self, wait: bool = True) -> Optional[asyncio.Future]:
+        """
+        Schedules an update for every observer at once. With `wait=False` the
+        subject doesn't wait for them (fire-and-forget) and returns the future
+        of the whole delivery instead.
+
+        Programa una actualización para cada observador a la vez.
+        """
+
+        print("AsyncSubject: Notificar a los observadores...")
+        semaphore = None
+        if self._max_concurrency:
+            loop = asyncio.get_running_loop()
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                    self._max_concurrency)
+        delivery = asyncio.gather(
+            *(self._deliver(o, semaphore) for o in self._observers))
+        if wait:
+            await delivery
+            return None
+
+        # The event loop only keeps weak references to tasks, so the subject
+        # holds the pending deliveries until they are done.
+        self._pending.add(delivery)
+        delivery.add_done_callback(self._pending.discard)
+        return delivery
+
+    async def some_business_logic(self, wait: bool = True) -> None:
+        print("\nAsyncSubject: I'm doing something important.")
+        self._state = randrange(0, 10)
+
+        print(f"AsyncSubject: My state has just changed to: {self._state}")
+        await self.notify(wait)
+
+
+class ConcreteAsyncObserverA(AsyncObserver):
+    async def update(self, subject: AsyncSubject) -> None:
+        await asyncio.sleep(0.01)
+        print("Envio notificacion al sns Async Observer A")
+        print("ConcreteAsyncObserverA: Reacted to the event")
+
+
+class SlowAsyncObserver(AsyncObserver):
+    async def update(self, subject: AsyncSubject) -> None:
+        await asyncio.sleep(10)
+        print("SlowAsyncObserver: Reacted to the event")
+
+
+async def async_client_code() -> None:
+    subject = AsyncSubject(timeout=0.1, max_concurrency=10)
+    subject.attach(ConcreteAsyncObserverA())
+    subject.attach(SlowAsyncObserver())
+
+    await subject.some_business_logic()
+    print(f"AsyncSubject: {subject.timeouts} observer timed out.")
+
+
 if __name__ == "__main__":
     # The client code.
 
@@ -178,3 +688,33 @@ if __name__ == "__main__":
     subject.detach(observer_b)
 
     subject.some_business_logic()
+
+    # The asynchronous subject doesn't let the slow observer hold up the rest.
+    asyncio.run(async_client_code())
+
+    # The topic subject only notifies the observers of the published topic.
+    topic_subject = TopicSubject()
+    topic_subject.attach(observer_a, "orders.*")
+    topic_subject.attach(observer_b, "payments.refunded")
+    topic_subject.some_business_logic("orders.created")
+    topic_subject.some_business_logic("payments.refunded")
+
+    # The weak subject forgets the observers nobody else refers to.
+    weak_subject = WeakSubject()
+    weak_subject.attach(observer_a)
+    weak_subject.attach(ConcreteObserverB())
+    weak_subject.some_business_logic()
+    live, collected = weak_subject.subscriber_stats()
+    print(f"WeakSubject: {live} live and {collected} collected subscribers.")
+
+    # The coalescing subject notifies once per burst of changes.
+    coalescing_subject = CoalescingSubject()
+    coalescing_subject.attach(observer_a)
+    coalescing_subject.some_business_logic()
+
+    # The fan-out subject runs each observer in its own process.
+    fan_out_subject = ProcessFanOutSubject()
+    fan_out_subject.attach(ConcreteObserverA())
+    fan_out_subject.attach(ConcreteObserverB())
+    fan_out_subject.some_business_logic()
+    fan_out_subject.close()
@@ -5,6 +5,8 @@ Intent: Lets you ensure that a class has only one instance, while providing a
 global access point to this instance. One instance per each subclass (if any).
 """
 
+import sys
+import time
 from threading import Lock, Thread
 
 
@@ -18,15 +20,27 @@ class SingletonMeta(type):
 
     _instances = {}
 
-    _lock: Lock = Lock()
-    """
-    We now have a lock object that will be used to synchronize threads during
-    first access to the Singleton.
-    
-    
-    Ahora tenemos un objeto de bloqueo que se usará para sincronizar subprocesos durante
-    primer acceso al Singleton.
-    """
+    # The per-class locks are kept here, rather than as attributes of the
+    # classes, so that they can't clash with the classes' own attributes.
+
+    # Los bloqueos de cada clase se guardan aquí, y no como atributos de las
+    # clases, para que no choquen con los atributos propios de las clases.
+    _locks = {}
+
+    def __init__(cls, *args, **kwargs):
+        """
+        Every class created with this metaclass (subclasses included) gets its
+        own lock, which will be used to synchronize threads during first access
+        to that Singleton. Creating one Singleton never makes the threads that
+        want another one wait.
+
+
+        Cada clase creada con esta metaclase (incluidas las subclases) tiene su
+        propio objeto de bloqueo, que se usará para sincronizar subprocesos
+        durante el primer acceso a ese Singleton.
+        """
+        super().__init__(*args, **kwargs)
+        SingletonMeta._locks[cls] = Lock()
 
     def __call__(cls, *args, **kwargs):
         """
@@ -37,6 +51,16 @@ class SingletonMeta(type):
         Los posibles cambios en el valor del argumento `__init__` no afectan
         la instancia devuelta.        
         """
+        # Once the instance exists, reading it from the dictionary is all it
+        # takes, and no lock is needed. This is the path almost every call
+        # follows.
+
+        # Una vez que la instancia existe, basta con leerla del diccionario, sin
+        # ningún bloqueo. Es el camino que siguen casi todas las llamadas.
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
         # Now, imagine that the program has just been launched. Since there's no
         # Singleton instance yet, multiple threads can simultaneously pass the
         # previous conditional and reach this point almost at the same time. The
@@ -48,7 +72,7 @@ class SingletonMeta(type):
         # condicional anterior y llegan a este punto casi al mismo tiempo. Él
         # el primero de ellos adquirirá el bloqueo y continuará, mientras que el
         # resto esperará aquí.
-        with cls._lock:
+        with SingletonMeta._locks[cls]:
             # The first thread to acquire the lock, reaches this conditional,
             # goes inside and creates the Singleton instance. Once it leaves the
             # lock block, a thread that might have been waiting for the lock
@@ -66,6 +90,27 @@ class SingletonMeta(type):
         return cls._instances[cls]
 
 
+class GlobalLockSingletonMeta(type):
+    """
+    The previous implementation, kept for comparison: every call takes the
+    same lock, even after the instance has been created.
+
+    La implementación anterior, conservada para comparar: cada llamada toma el
+    mismo bloqueo, incluso después de crear la instancia.
+    """
+
+    _instances = {}
+
+    _lock: Lock = Lock()
+
+    def __call__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls not in cls._instances:
+                instance = super().__call__(*args, **kwargs)
+                cls._instances[cls] = instance
+        return cls._instances[cls]
+
+
 class Singleton(metaclass=SingletonMeta):
     _value: str = None
     """
@@ -95,7 +140,41 @@ def test_singleton(value: str) -> None:
     singleton.imprime()    
 
 
-if __name__ == "__main__":
+def benchmark_singleton(calls: int = 200_000,
+                        thread_counts=(1, 4, 16, 64)) -> None:
+    """
+    Measures how many Singleton lookups per second several threads get with
+    the per-class locks and with the previous global lock.
+    """
+
+    class FastPath(metaclass=SingletonMeta):
+        pass
+
+    class GlobalLock(metaclass=GlobalLockSingletonMeta):
+        pass
+
+    for threads in thread_counts:
+        results = []
+        for cls in (FastPath, GlobalLock):
+            def lookups() -> None:
+                for _ in range(calls // threads):
+                    cls()
+
+            workers = [Thread(target=lookups) for _ in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            results.append(f"{cls.__name__} {calls / elapsed:12,.0f} calls/s")
+        print(f"{threads:2} threads: " + ", ".join(results))
+
+
+if __name__ == "__main__" and "--benchmark" in sys.argv:
+    benchmark_singleton()
+
+elif __name__ == "__main__":
     # The client code.
 
     # print("If you see the same value, then singleton was reused (yay!)\n"